@@ -397,8 +397,6 @@ class BagConverterApp(QMainWindow):
         """Update progress bar and status message"""
         self.progress_bar.setValue(value)
         self.progress_label.setText(message)
-        # Force UI update
-        QApplication.processEvents()
     
     def conversion_complete(self):
         """Called when conversion is complete"""
@@ -1,229 +1,445 @@
-def update_extraction_options(self, mode):
-        """Ensure only one extraction option is selected at a time"""
-        self.extraction_mode = mode
-        
-        # Update checkboxes
-        self.extract_both_radio.setChecked(mode == "both")
-        self.extract_ply_only_radio.setChecked(mode == "ply")
-        self.extract_png_only_radio.setChecked(mode == "png")
-
 import os
 import sys
-import shutil
-import subprocess
 import time
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
                             QWidget, QFileDialog, QLabel, QProgressBar, QListWidget, 
-                            QListWidgetItem, QCheckBox, QGroupBox, QMessageBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+                            QListWidgetItem, QRadioButton, QButtonGroup, QGroupBox, QMessageBox,
+                            QSpinBox)
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QSize, QMutex, QMutexLocker, QWaitCondition,
+                          QStandardPaths)
+
+import bag_core
+
+# Extraction modes, indexed by their button id in the extraction options group
+EXTRACTION_MODES = ("both", "ply", "png")
+
+# File types named in the status message of each extraction mode
+MODE_LABELS = {"both": "PLY and PNG", "ply": "PLY", "png": "PNG"}
+
+# Seconds between progress checks (and progress updates sent to the UI) during extraction
+POLL_INTERVAL = 0.25
+
+# Extraction rate assumed until a file has been converted, in bytes per second
+DEFAULT_BYTES_PER_SECOND = 20 * 1024 * 1024
+
+# Bytes of PLY/PNG output expected per byte of bag file until a file has been converted
+DEFAULT_OUTPUT_RATIO = 2.5
+
+# Allowance for coarse file timestamps (FAT rounds them to 2 seconds) when matching new output
+MTIME_SLACK = 2
+
+# Weight of the newest file in the moving average of the extraction rate
+RATE_SMOOTHING = 0.2
+
+# Extractions allowed at once before the job limit has been tuned
+INITIAL_JOB_LIMIT = 2
+
+# Default limit for the summed size of bag files being extracted at the same time
+MAX_INFLIGHT_BYTES = 8 * 1024 ** 3
 
 class ConversionWorker(QThread):
     """Worker thread to handle the conversion process without freezing the UI"""
     update_progress = pyqtSignal(int, str)
     conversion_complete = pyqtSignal()
     
-    def __init__(self, bag_files, rs_convert_path, extraction_mode="both"):
+    def __init__(self, bag_files, rs_convert_path, extraction_mode="both", max_parallel_jobs=None,
+                 bag_sizes=None):
         super().__init__()
         self.bag_files = bag_files
+        self.bag_sizes = bag_sizes or {}  # Sizes already known from loading the bag files
+        self.file_sizes = []
         self.rs_convert_path = rs_convert_path
         self.canceled = False
-        self.start_time = None
         self.extraction_mode = extraction_mode  # "both", "ply", or "png"
+        self.max_parallel_jobs = max_parallel_jobs or os.cpu_count() or 1
+        self.max_inflight_bytes = MAX_INFLIGHT_BYTES
+        self.link_instead_of_copy = True  # Link the bag into its item folder when possible
+        
+        # Average extraction rate and output size, refined after every converted file and kept
+        # between runs
+        self.bytes_per_second = DEFAULT_BYTES_PER_SECOND
+        self.output_ratio = DEFAULT_OUTPUT_RATIO
+        self.rate_samples = 0
+        self.output_samples = 0
+        self.rate_cache_path = os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "bag_rates.json"
+        )
+        self.load_rate_cache()
+        
+        # Bytes of bag files whose extraction hasn't started yet, for the batch estimate
+        self.queued_bytes = 0
+        self.dequeued_files = set()  # Indexes of the files already taken out of queued_bytes
+        
+        # Extractions share the disk, so they only start while they fit in the job limit and the
+        # in-flight byte budget. The job limit grows from INITIAL_JOB_LIMIT while that raises the
+        # throughput and backs off once it drops.
+        self.job_mutex = QMutex()
+        self.job_slot_free = QWaitCondition()
+        self.job_limit = min(INITIAL_JOB_LIMIT, self.max_parallel_jobs)
+        self.job_limit_tuned = False
+        self.inflight_jobs = 0
+        self.inflight_bytes = 0
+        self.next_job_id = 1
+        self.job_peaks = {}  # Most extractions seen running at once during each running job
+        self.throughput_by_jobs = {}  # Summed throughput and sample count per number of jobs
+        
+        # Several files convert at once, so progress updates are serialized
+        self.progress_mutex = QMutex()
+        self.file_progress = []
+        self.folder_errors = {}  # Folders that couldn't be created, with their error
         
     def run(self):
         total_files = len(self.bag_files)
-        self.start_time = os.path.getmtime(self.bag_files[0]) if self.bag_files else None
+        self.file_progress = [0.0] * total_files
         processed_files = 0
+        finished_files = 0
         
-        for i, bag_file in enumerate(self.bag_files):
-            if self.canceled:
-                break
-                
-            try:
-                bag_filename = os.path.basename(bag_file)
-                file_size = os.path.getsize(bag_file)
-                
-                # Initialize progress for this file
-                base_progress = (i / total_files) * 100
-                file_progress_weight = 100 / total_files
-                
-                # Update with file starting
-                self.update_progress.emit(
-                    int(base_progress), 
-                    f"Starting file {i+1}/{total_files}: {bag_filename}"
-                )
-                
-                # Create folder structure - 10% of the file's progress
-                self.update_progress.emit(
-                    int(base_progress + file_progress_weight * 0.1),
-                    f"Creating folders for {bag_filename}"
-                )
+        if total_files:
+            self.file_sizes = [self.get_file_size(bag_file) for bag_file in self.bag_files]
+            self.queued_bytes = sum(self.file_sizes)
+            self.dequeued_files = set()
+            
+            # Create the folders of every file in one pass before any conversion starts,
+            # a folder that fails only fails its own file
+            folder_structures = [bag_core.get_folder_structure(bag_file, self.extraction_mode)
+                                 for bag_file in self.bag_files]
+            self.folder_errors = bag_core.create_folder_structures(folder_structures)
+            
+            # rs-convert does the heavy lifting in its own process, so threads are
+            # enough to keep several conversions running at the same time
+            max_workers = min(self.max_parallel_jobs, total_files)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._convert_one, i, bag_file, folder_structures[i]): (i, bag_file)
+                    for i, bag_file in enumerate(self.bag_files)
+                }
                 
-                # Create folder structure
-                source_folder, item_folder, ply_folder, png_folder = self.create_folder_structure(bag_file)
+                for future in as_completed(futures):
+                    i, bag_file = futures[future]
+                    finished_files += 1
+                    
+                    if self.canceled:
+                        continue
+                    
+                    bag_filename = bag_file.name
+                    if future.result():
+                        processed_files += 1
+                        # File complete - full progress for this file
+                        self.report_progress(
+                            i, 1.0,
+                            f"Completed file {finished_files}/{total_files}: {bag_filename}"
+                        )
+                    else:
+                        self.report_progress(
+                            i, 1.0,
+                            f"Failed file {finished_files}/{total_files}: {bag_filename}"
+                        )
+        
+        self.save_rate_cache()
+        
+        # Nothing needs the file list anymore, don't keep it alive with the worker
+        self.bag_files = []
+        self.bag_sizes = {}
+        self.file_sizes = []
+        self.file_progress = []
+        self.folder_errors = {}
+        
+        self.conversion_complete.emit()
+    
+    def _convert_one(self, file_index, bag_file, folder_structure):
+        """Copy and extract a single bag file into its already created folders"""
+        total_files = len(self.bag_files)
+        bag_filename = bag_file.name
+        
+        try:
+            if self.canceled:
+                return False
                 
+            # Update with file starting
+            self.report_progress(
+                file_index, 0.0,
+                f"Starting file {file_index+1}/{total_files}: {bag_filename}"
+            )
+            
+            source_folder, item_folder, ply_folder, png_folder = folder_structure
+            
+            # Don't go on without the folders this file needs
+            for folder in (item_folder, ply_folder, png_folder):
+                if folder in self.folder_errors:
+                    raise self.folder_errors[folder]
+            
+            item_bag_file = item_folder / bag_filename
+            
+            # Linking is a single filesystem operation, so only report copying when we fall back to it
+            if not (self.link_instead_of_copy and bag_core.link_bag_file(bag_file, item_bag_file)):
                 # Copy the original .bag file - 20% of the file's progress
-                self.update_progress.emit(
-                    int(base_progress + file_progress_weight * 0.2), 
-                    f"Copying {bag_filename}"
-                )
-                
-                item_bag_file = os.path.join(item_folder, bag_filename)
-                shutil.copy2(bag_file, item_bag_file)
-                
-                # Extraction is the most time-consuming part - Starts at 20% of this file's allocation
-                self.update_progress.emit(
-                    int(base_progress + file_progress_weight * 0.2), 
-                    f"Extracting data from {bag_filename} (this may take a while)"
-                )
+                self.report_progress(file_index, 0.2, f"Copying {bag_filename}")
+                bag_core.fast_copy(bag_file, item_bag_file)
+            
+            # Wait until the disk has room for another extraction
+            file_size = self.file_sizes[file_index]
+            job_id = self.acquire_job_slot(file_size)
+            if not job_id:
+                return False
+            
+            # Extraction is the most time-consuming part - Starts at 20% of this file's allocation
+            self.report_progress(
+                file_index, 0.2,
+                f"Extracting data from {bag_filename} (this may take a while)"
+            )
+            
+            # Extract .ply and .png files (folders only exist for the selected types)
+            ply_output_path, png_output_path = bag_core.get_output_paths(ply_folder, png_folder)
+            
+            # The extraction process with time estimation
+            extraction_start_time = self.get_current_time()
+            success = False
+            try:
+                success = self.extract_data(bag_file, ply_output_path, png_output_path,
+                                            file_index, file_size)
+            finally:
+                self.release_job_slot(job_id, file_size, success,
+                                      self.get_current_time() - extraction_start_time)
+            return success
+            
+        except Exception as e:
+            self.report_progress(
+                file_index, None,
+                f"Error processing {bag_filename}: {str(e)}"
+            )
+            return False
+        finally:
+            # However the file ended, it no longer counts towards the batch estimate
+            self.dequeue_file(file_index)
+    
+    def dequeue_file(self, file_index):
+        """Take a file's bytes out of the batch estimate, only the first time it's called for it"""
+        with QMutexLocker(self.progress_mutex):
+            if file_index in self.dequeued_files:
+                return
+            self.dequeued_files.add(file_index)
+            self.queued_bytes -= self.file_sizes[file_index]
+    
+    def get_file_size(self, bag_file):
+        """Get the size of a bag file, 0 if it has gone missing (its conversion reports the error)"""
+        if bag_file in self.bag_sizes:
+            return self.bag_sizes[bag_file]
+        try:
+            return bag_file.stat().st_size
+        except OSError:
+            return 0
+    
+    def acquire_job_slot(self, file_size):
+        """Wait for room to start an extraction, returning its job id (0 if canceled)"""
+        with QMutexLocker(self.job_mutex):
+            # A file larger than the whole byte budget still runs, but only on its own
+            while not self.canceled and (
+                self.inflight_jobs >= self.job_limit
+                or (self.inflight_jobs and self.inflight_bytes + file_size > self.max_inflight_bytes)
+            ):
+                self.job_slot_free.wait(self.job_mutex, int(POLL_INTERVAL * 1000))
                 
-                # Extract .ply and .png files
-                ply_output_path = os.path.join(ply_folder, "ply")
-                png_output_path = os.path.join(png_folder, "png")
+            if self.canceled:
+                return 0
                 
-                # The extraction process with time estimation
-                success = self.extract_data(bag_file, ply_output_path, png_output_path, 
-                                           base_progress, file_progress_weight, i, total_files)
+            self.inflight_jobs += 1
+            self.inflight_bytes += file_size
+            
+            job_id = self.next_job_id
+            self.next_job_id += 1
+            
+            # Every running job has now run alongside this many others
+            self.job_peaks[job_id] = 0
+            for running_id in self.job_peaks:
+                self.job_peaks[running_id] = max(self.job_peaks[running_id], self.inflight_jobs)
+            return job_id
+    
+    def release_job_slot(self, job_id, file_size, success, elapsed_seconds):
+        """Free the room of a finished extraction and tune the job limit from its throughput"""
+        with QMutexLocker(self.job_mutex):
+            self.inflight_jobs -= 1
+            self.inflight_bytes -= file_size
+            concurrency = self.job_peaks.pop(job_id)
+            
+            if success and not self.job_limit_tuned:
+                # Throughput of the whole batch while this many extractions ran together
+                throughput = file_size / max(elapsed_seconds, 1e-3) * concurrency
+                total, samples = self.throughput_by_jobs.get(concurrency, (0.0, 0))
+                self.throughput_by_jobs[concurrency] = (total + throughput, samples + 1)
                 
-                if success:
-                    processed_files += 1
-                    # File complete - full progress for this file
-                    self.update_progress.emit(
-                        int(base_progress + file_progress_weight), 
-                        f"Completed file {i+1}/{total_files}: {bag_filename}"
-                    )
+                average = (total + throughput) / (samples + 1)
+                fewer_jobs = self.throughput_by_jobs.get(concurrency - 1)
                 
-            except Exception as e:
-                self.update_progress.emit(
-                    int((i / total_files) * 100), 
-                    f"Error processing {os.path.basename(bag_file)}: {str(e)}"
-                )
-        
-        self.conversion_complete.emit()
-    
-    def create_folder_structure(self, bag_file):
-        """Create folder structure for a bag file"""
-        source_folder = os.path.dirname(bag_file)
-        bag_filename = os.path.basename(bag_file)
-        item_name = os.path.splitext(bag_filename)[0]
-        
-        # Create a new folder for this item
-        item_folder = os.path.join(source_folder, item_name)
-        os.makedirs(item_folder, exist_ok=True)
-        
-        # Create subfolders only for the file types we're extracting
-        ply_folder = None
-        png_folder = None
-        
-        if self.extraction_mode == "both" or self.extraction_mode == "ply":
-            ply_folder = os.path.join(item_folder, f"{item_name}_ply")
-            os.makedirs(ply_folder, exist_ok=True)
+                if fewer_jobs and average < fewer_jobs[0] / fewer_jobs[1]:
+                    # The extra job slowed the disk down, settle on one less
+                    self.job_limit = max(1, concurrency - 1)
+                    self.job_limit_tuned = True
+                elif concurrency >= self.job_limit and self.job_limit < self.max_parallel_jobs:
+                    self.job_limit += 1
             
-        if self.extraction_mode == "both" or self.extraction_mode == "png":
-            png_folder = os.path.join(item_folder, f"{item_name}_png")
-            os.makedirs(png_folder, exist_ok=True)
-        
-        return source_folder, item_folder, ply_folder, png_folder
+            self.job_slot_free.wakeAll()
     
-    def extract_data(self, bag_file, ply_output_path, png_output_path, base_progress, file_progress_weight, 
-                    current_file_index, total_files):
+    def report_progress(self, file_index, file_fraction, message):
+        """Record progress of one file and emit the overall progress of the batch"""
+        with QMutexLocker(self.progress_mutex):
+            if file_fraction is not None:
+                self.file_progress[file_index] = file_fraction
+            overall = sum(self.file_progress) / len(self.file_progress) * 100
+            self.update_progress.emit(int(overall), message)
+    
+    def extract_data(self, bag_file, ply_output_path, png_output_path, current_file_index, file_size):
         """Extract data from a bag file with progress monitoring"""
-        bag_filename = os.path.basename(bag_file)
+        bag_filename = bag_file.name
         
-        # Build the command to run rs-convert.exe based on extraction mode
-        command = [self.rs_convert_path, "-i", bag_file]
+        # Output folders, progress is measured by how much rs-convert has written into them
+        output_folders = [path.parent for path in (ply_output_path, png_output_path) if path]
         
-        # Add output parameters based on extraction mode
-        if self.extraction_mode == "both" or self.extraction_mode == "ply":
-            command.extend(["-l", ply_output_path])
+        try:
+            # Only files written from now on count as output, earlier runs leave files with the same
+            # names that rs-convert overwrites
+            output_tracker = bag_core.OutputSizeTracker(output_folders, time.time() - MTIME_SLACK)
             
-        if self.extraction_mode == "both" or self.extraction_mode == "png":
-            command.extend(["-p", png_output_path])
+            # Start rs-convert.exe for the file types of the extraction mode
+            process = bag_core.start_rs_convert(bag_file, self.rs_convert_path,
+                                                ply_output_path, png_output_path)
             
-        try:
-            # Start the process with pipe for output
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
-            )
+            # Status message doesn't change while this file extracts
+            base_status = f"Extracting {MODE_LABELS[self.extraction_mode]} from {bag_filename}"
+            report_progress = self.report_progress
+            
+            # This file is no longer waiting, so it leaves the batch estimate
+            self.dequeue_file(current_file_index)
+            expected_seconds = max(file_size / self.bytes_per_second, 1e-3)
+            expected_output = max(file_size * self.output_ratio, 1)
             
             # Track start time for this specific extraction
             extraction_start_time = self.get_current_time()
-            progress_updates = 0
             
-            # Read output line by line to estimate progress
-            for line in iter(process.stdout.readline, ''):
+            # Check how much output has been written every POLL_INTERVAL seconds
+            while process.poll() is None:
                 if self.canceled:
                     process.terminate()
                     return False
                 
-                # Increment progress based on output lines - this is an approximation
-                # since we don't know the exact percentage from rs-convert
-                progress_updates += 1
+                time.sleep(POLL_INTERVAL)
                 
-                # Let's assume a typical extraction produces ~100 lines of output
-                # and limit our extract phase to go from 20% to 90% of file's progress
-                extract_progress = min(0.7, (progress_updates / 100) * 0.7)
+                # Limit our extract phase to go from 20% to 90% of file's progress
+                produced = output_tracker.size()
+                extract_progress = min(0.7, (produced / expected_output) * 0.7)
                 
                 # Calculate elapsed time and estimate remaining time
                 elapsed_seconds = self.get_current_time() - extraction_start_time
-                remaining_files = total_files - current_file_index - 1
-                
-                # Only show time estimate after we've processed for at least 2 seconds
-                time_estimate = ""
-                if elapsed_seconds > 2:
-                    # Estimate for this file
-                    if extract_progress > 0.1:  # Only estimate after some progress
-                        file_remaining = elapsed_seconds * (0.7 - extract_progress) / extract_progress
-                        
-                        # Estimate for all remaining files
-                        total_remaining = file_remaining + (elapsed_seconds / extract_progress) * remaining_files
-                        
-                        if total_remaining < 60:
-                            time_estimate = f" - Est. {int(total_remaining)} seconds remaining"
-                        else:
-                            time_estimate = f" - Est. {int(total_remaining/60)} minutes remaining"
                 
-                # Update progress
-                progress = base_progress + (0.2 + extract_progress) * file_progress_weight
+                # Estimate for this file, from its own output once there is enough of it
+                # and from the known extraction rate before that
+                if elapsed_seconds > 2 and extract_progress > 0.1:
+                    file_remaining = elapsed_seconds * (0.7 - extract_progress) / extract_progress
+                else:
+                    file_remaining = max(0.0, expected_seconds - elapsed_seconds)
+                time_estimate = self.format_time_estimate(file_remaining)
                 
-                # Update status message based on extraction mode
-                if self.extraction_mode == "both":
-                    status = f"Extracting PLY and PNG from {bag_filename}"
-                elif self.extraction_mode == "ply":
-                    status = f"Extracting PLY from {bag_filename}"
-                else:  # png
-                    status = f"Extracting PNG from {bag_filename}"
-                    
-                self.update_progress.emit(
-                    int(progress),
-                    f"{status} ({int((0.2 + extract_progress) * 100)}%){time_estimate}"
+                report_progress(
+                    current_file_index, 0.2 + extract_progress,
+                    f"{base_status} ({int((0.2 + extract_progress) * 100)}%){time_estimate}"
                 )
             
             # Wait for the process to complete
             process.wait()
             
             # Final extraction update - 90% of file's progress
-            self.update_progress.emit(
-                int(base_progress + file_progress_weight * 0.9),
-                f"Finalizing {bag_filename}"
-            )
+            self.report_progress(current_file_index, 0.9, f"Finalizing {bag_filename}")
+            
+            if process.returncode == 0:
+                produced = output_tracker.size(recheck_all=True)
+                self.update_extraction_rate(file_size, self.get_current_time() - extraction_start_time,
+                                            produced)
             
             return process.returncode == 0
             
         except Exception as e:
-            self.update_progress.emit(
-                int(base_progress + file_progress_weight * 0.5),
+            self.report_progress(
+                current_file_index, 0.5,
                 f"Error during extraction: {str(e)}"
             )
             return False
     
+    def update_extraction_rate(self, file_size, elapsed_seconds, output_size):
+        """Fold a finished extraction into the moving averages of its rate and output size"""
+        with QMutexLocker(self.progress_mutex):
+            rate = file_size / max(elapsed_seconds, 1e-3)
+            if self.rate_samples:
+                self.bytes_per_second = (1 - RATE_SMOOTHING) * self.bytes_per_second + RATE_SMOOTHING * rate
+            else:
+                self.bytes_per_second = rate
+            self.rate_samples += 1
+            
+            # No measured output says nothing about the output size, so keep the current ratio
+            if output_size <= 0 or file_size <= 0:
+                return
+                
+            output_ratio = output_size / file_size
+            if self.output_samples:
+                self.output_ratio = (1 - RATE_SMOOTHING) * self.output_ratio + RATE_SMOOTHING * output_ratio
+            else:
+                self.output_ratio = output_ratio
+            self.output_samples += 1
+    
+    def load_rate_cache(self):
+        """Load the extraction rate and output size measured in earlier runs"""
+        try:
+            with open(self.rate_cache_path) as cache_file:
+                cache = json.load(cache_file)
+            bytes_per_second = float(cache["bytes_per_second"])
+            samples = int(cache["samples"])
+            output_ratio = float(cache.get("output_ratio", DEFAULT_OUTPUT_RATIO))
+            output_samples = int(cache.get("output_samples", 0))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+            
+        if bytes_per_second > 0:
+            self.bytes_per_second = bytes_per_second
+            self.rate_samples = samples
+            
+        # The output ratio is checked on its own so a bad value doesn't discard the rate
+        if output_ratio > 0:
+            self.output_ratio = output_ratio
+            self.output_samples = output_samples
+    
+    def save_rate_cache(self):
+        """Save the extraction rate and output size for later runs"""
+        if not self.rate_samples:
+            return
+            
+        try:
+            os.makedirs(os.path.dirname(self.rate_cache_path), exist_ok=True)
+            
+            # Write to a temporary file first so a crash never leaves a half-written cache
+            temp_path = self.rate_cache_path + ".tmp"
+            with open(temp_path, "w") as cache_file:
+                json.dump({"bytes_per_second": self.bytes_per_second,
+                           "output_ratio": self.output_ratio,
+                           "output_samples": self.output_samples,
+                           "samples": self.rate_samples},
+                          cache_file)
+            os.replace(temp_path, self.rate_cache_path)
+        except OSError:
+            pass
+    
+    def format_time_estimate(self, file_remaining):
+        """Format the remaining time for this file and the files still queued"""
+        # Queued files are shared between the running jobs, all extracting at the known rate
+        total_remaining = file_remaining + self.queued_bytes / (self.bytes_per_second * self.job_limit)
+        
+        if total_remaining < 60:
+            return f" - Est. {int(total_remaining)} seconds remaining"
+        return f" - Est. {int(total_remaining/60)} minutes remaining"
+    
     def get_current_time(self):
-        """Get current time in seconds"""
-        return time.time()
+        """Get current time in seconds from a clock that never goes backwards"""
+        return time.monotonic()
     
     def cancel(self):
         """Cancel the conversion process"""
@@ -236,7 +452,7 @@ class BagConverterApp(QMainWindow):
         self.setWindowTitle("Bag File Converter")
         self.setGeometry(100, 100, 800, 600)
         
-        self.bag_files = []
+        self.bag_sizes = {}  # Size in bytes of each loaded bag file, keyed by Path
         self.rs_convert_path = ""
         self.worker = None
         self.extraction_mode = "both"  # Default to extract both PLY and PNG
@@ -278,22 +494,36 @@ class BagConverterApp(QMainWindow):
         extraction_layout.addWidget(extraction_label)
         
         # Radio buttons for extraction options
-        self.extract_both_radio = QCheckBox("Extract both PLY and PNG files")
+        self.extract_both_radio = QRadioButton("Extract both PLY and PNG files")
         self.extract_both_radio.setChecked(True)
-        self.extract_ply_only_radio = QCheckBox("Extract PLY files only")
-        self.extract_png_only_radio = QCheckBox("Extract PNG files only")
+        self.extract_ply_only_radio = QRadioButton("Extract PLY files only")
+        self.extract_png_only_radio = QRadioButton("Extract PNG files only")
         
         extraction_layout.addWidget(self.extract_both_radio)
         extraction_layout.addWidget(self.extract_ply_only_radio)
         extraction_layout.addWidget(self.extract_png_only_radio)
         
-        # Connect signals to ensure only one option is selected at a time
-        self.extract_both_radio.clicked.connect(lambda: self.update_extraction_options("both"))
-        self.extract_ply_only_radio.clicked.connect(lambda: self.update_extraction_options("ply"))
-        self.extract_png_only_radio.clicked.connect(lambda: self.update_extraction_options("png"))
+        # An exclusive button group keeps only one option selected at a time
+        self.extraction_group = QButtonGroup(self)
+        self.extraction_group.setExclusive(True)
+        self.extraction_group.addButton(self.extract_both_radio, EXTRACTION_MODES.index("both"))
+        self.extraction_group.addButton(self.extract_ply_only_radio, EXTRACTION_MODES.index("ply"))
+        self.extraction_group.addButton(self.extract_png_only_radio, EXTRACTION_MODES.index("png"))
+        self.extraction_group.buttonClicked[int].connect(self.set_extraction_mode)
         
         config_layout.addLayout(extraction_layout)
         
+        # Limit how many bag files are converted at the same time
+        jobs_layout = QHBoxLayout()
+        jobs_label = QLabel("Max parallel jobs:")
+        self.jobs_spinbox = QSpinBox()
+        self.jobs_spinbox.setRange(1, os.cpu_count() or 1)
+        self.jobs_spinbox.setValue(os.cpu_count() or 1)
+        jobs_layout.addWidget(jobs_label)
+        jobs_layout.addWidget(self.jobs_spinbox)
+        jobs_layout.addStretch()
+        config_layout.addLayout(jobs_layout)
+        
         main_layout.addWidget(config_group)
         
         # Create file selection group
@@ -351,6 +581,10 @@ class BagConverterApp(QMainWindow):
         
         main_layout.addLayout(button_layout)
     
+    def set_extraction_mode(self, button_id):
+        """Store the extraction mode of the clicked option"""
+        self.extraction_mode = EXTRACTION_MODES[button_id]
+    
     def browse_rs_convert(self):
         """Browse for the rs-convert.exe file"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -376,17 +610,26 @@ class BagConverterApp(QMainWindow):
     def load_bag_files(self, directory):
         """Load .bag files from the selected directory"""
         self.file_list.clear()
-        self.bag_files = []
-        
-        # Find all .bag files in the directory
-        for file in os.listdir(directory):
-            if file.endswith(".bag"):
-                file_path = os.path.join(directory, file)
-                self.bag_files.append(file_path)
+        self.bag_sizes = {}
+        
+        # Find all .bag files in the directory, keeping their sizes from the same scan
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Skips folders and dangling links as well
+                if not entry.name.endswith(".bag") or not entry.is_file():
+                    continue
+                    
+                bag_file = Path(entry.path)
+                try:
+                    self.bag_sizes[bag_file] = entry.stat().st_size
+                except OSError:
+                    # Still listed, the worker looks the size up again and reports the error
+                    pass
                 
-                # Add to list with checkbox
+                # Add to list with checkbox, keeping the full path on the item
                 item = QListWidgetItem()
-                item.setText(file)
+                item.setText(entry.name)
+                item.setData(Qt.UserRole, bag_file)
                 item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
                 item.setCheckState(Qt.Checked)
                 self.file_list.addItem(item)
@@ -416,9 +659,7 @@ class BagConverterApp(QMainWindow):
         for i in range(self.file_list.count()):
             item = self.file_list.item(i)
             if item.checkState() == Qt.Checked:
-                file_name = item.text()
-                directory = os.path.dirname(self.bag_files[0])
-                selected_files.append(os.path.join(directory, file_name))
+                selected_files.append(item.data(Qt.UserRole))
         return selected_files
     
     def start_conversion(self):
@@ -429,6 +670,9 @@ class BagConverterApp(QMainWindow):
             QMessageBox.warning(self, "No Files Selected", "Please select at least one bag file to convert.")
             return
         
+        # Start the largest files first so they don't end up running alone at the end
+        selected_files.sort(key=lambda path: self.bag_sizes.get(path, 0), reverse=True)
+        
         # Disable UI elements during conversion
         self.convert_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
@@ -437,18 +681,19 @@ class BagConverterApp(QMainWindow):
         self.progress_bar.setValue(0)
         self.progress_label.setText("Starting conversion...")
         
-        # Start worker thread with current extraction mode
-        self.worker = ConversionWorker(selected_files, self.rs_convert_path, self.extraction_mode)
+        # Start worker thread with current extraction mode and job limit
+        self.worker = ConversionWorker(selected_files, self.rs_convert_path, self.extraction_mode,
+                                       self.jobs_spinbox.value(), self.bag_sizes)
         self.worker.update_progress.connect(self.update_progress)
         self.worker.conversion_complete.connect(self.conversion_complete)
+        worker = self.worker
+        self.worker.finished.connect(lambda: self.worker_finished(worker))
         self.worker.start()
     
     def update_progress(self, value, message):
         """Update progress bar and status message"""
         self.progress_bar.setValue(value)
         self.progress_label.setText(message)
-        # Force UI update
-        QApplication.processEvents()
     
     def conversion_complete(self):
         """Called when conversion is complete"""
@@ -462,6 +707,13 @@ class BagConverterApp(QMainWindow):
         # Reset the progress bar after completion
         self.progress_bar.setValue(0)
     
+    def worker_finished(self, worker):
+        """Drop the reference to a worker whose thread has stopped so it can be freed"""
+        # finished is emitted just before the thread exits, wait so it is never destroyed while running
+        worker.wait()
+        if self.worker is worker:
+            self.worker = None
+    
     def cancel_conversion(self):
         """Cancel the current conversion process"""
         if self.worker and self.worker.isRunning():
@@ -0,0 +1,287 @@
+import os
+import sys
+import shutil
+import subprocess
+import ctypes
+from collections import deque
+
+# Platform specific options for starting rs-convert, worked out once
+if sys.platform == "win32":
+    # No console window per conversion, and a process group of its own so it can be stopped alone
+    POPEN_OPTIONS = {
+        "creationflags": subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    }
+else:
+    # Without a preexec_fn, Python can start the child through its vfork/posix_spawn fast path
+    POPEN_OPTIONS = {"close_fds": True}
+
+# ioctl request number for a copy-on-write clone on Btrfs/XFS (Linux FICLONE)
+FICLONE = 0x40049409
+
+# Files left by an earlier run that OutputSizeTracker checks for being overwritten on each call
+STALE_CHECKS = 256
+
+def fast_copy(src, dst):
+    """Copy a file, preferring a hardlink or copy-on-write clone over a byte copy"""
+    if os.path.lexists(dst):
+        # Already linked by a previous run, nothing to copy
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return dst
+        os.remove(dst)
+
+    # A hardlink is free on the same volume and safe since rs-convert only reads the bag
+    try:
+        os.link(src, dst)
+        return dst
+    except OSError:
+        pass
+
+    # Reflink clone on Linux filesystems that support it
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            shutil.copystat(src, dst)
+            return dst
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+
+    # clonefile on APFS
+    if sys.platform == "darwin":
+        try:
+            libsystem = ctypes.CDLL("/usr/lib/libSystem.dylib", use_errno=True)
+            if libsystem.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+                return dst
+        except OSError:
+            pass
+
+    # Fall back to a regular copy
+    return shutil.copy2(src, dst)
+
+
+def link_bag_file(bag_file, item_bag_file):
+    """Link the original bag file into its item folder, a hardlink if possible and a symlink if not"""
+    try:
+        if os.path.lexists(item_bag_file):
+            # Linked or copied by a previous run
+            if os.path.exists(item_bag_file) and os.path.samefile(bag_file, item_bag_file):
+                return True
+            os.remove(item_bag_file)
+
+        original = bag_file.resolve(strict=True)
+
+        # A hardlink is a full second name for the bag, it survives deleting the original or
+        # moving the item folder
+        try:
+            os.link(original, item_bag_file)
+            return True
+        except OSError:
+            pass
+
+        # Where hardlinks aren't available a symlink still avoids the copy
+        os.symlink(original, item_bag_file)
+        return True
+    except OSError:
+        # Windows needs SeCreateSymbolicLinkPrivilege (or Developer Mode) for symlinks
+        return False
+
+
+def make_dirs(folders):
+    """Create a batch of folders, only issuing calls for the deepest ones
+
+    Returns:
+        dict: The error of every folder that couldn't be created, keyed by folder
+    """
+    # makedirs creates parents on the way, so folders that contain another one are skipped
+    folders = set(folders)
+    parents = {folder.parent for folder in folders}
+
+    # A folder that can't be created doesn't stop the others, its bag reports the error
+    errors = {}
+    for folder in sorted(folders - parents):
+        try:
+            os.mkdir(folder)
+        except FileExistsError as e:
+            # Fine if it's a folder left by a previous run, not if it's a file in the way
+            if not os.path.isdir(folder):
+                errors[folder] = e
+        except FileNotFoundError:
+            try:
+                os.makedirs(folder, exist_ok=True)
+            except OSError as e:
+                errors[folder] = e
+        except OSError as e:
+            errors[folder] = e
+    return errors
+
+
+class OutputSizeTracker:
+    """Track how much has been written into output folders since a point in time
+
+    Meant to be polled. A file is only statted until it has been counted, except the newest
+    one of each folder, which may still be growing, so a poll costs a directory listing plus
+    the files written since the last one, not a stat of every frame extracted so far.
+    """
+
+    def __init__(self, folders, modified_since=0):
+        self.folders = folders
+        self.modified_since = modified_since
+        self.total = 0
+        self.sizes = {}  # Size of every counted file, keyed by path
+        self.newest = {}  # Newest counted file of each folder and its mtime
+        self.stale = set()  # Files left by an earlier run that haven't been overwritten yet
+        self.stale_queue = deque()
+
+    def count(self, path, stat):
+        """Count a file, or update its size if it was counted before"""
+        self.total += stat.st_size - self.sizes.get(path, 0)
+        self.sizes[path] = stat.st_size
+
+    def size(self, recheck_all=False):
+        """Look for new output and return the total size written since the start
+
+        Args:
+            recheck_all (bool): Check every file left by an earlier run, not just a few per call
+        """
+        for folder in self.folders:
+            newest_path, newest_mtime = self.newest.get(folder, (None, 0))
+            previous_newest = newest_path
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        path = entry.path
+                        if path in self.stale or (path in self.sizes and path != previous_newest):
+                            continue
+                        if not entry.is_file():
+                            continue
+
+                        stat = entry.stat()
+                        if stat.st_mtime < self.modified_since:
+                            self.stale.add(path)
+                            self.stale_queue.append(path)
+                            continue
+
+                        self.count(path, stat)
+                        if stat.st_mtime >= newest_mtime:
+                            newest_path, newest_mtime = path, stat.st_mtime
+            except OSError:
+                continue
+
+            # The previous newest file is complete once a newer one shows up, take its final size
+            if previous_newest and previous_newest != newest_path:
+                try:
+                    self.count(previous_newest, os.stat(previous_newest))
+                except OSError:
+                    pass
+            self.newest[folder] = (newest_path, newest_mtime)
+
+        # rs-convert overwrites the files of an earlier run as it goes, a few of them are checked
+        # per call so a re-run still shows progress without statting all of them every time
+        checks = len(self.stale_queue) if recheck_all else min(STALE_CHECKS, len(self.stale_queue))
+        for _ in range(checks):
+            path = self.stale_queue.popleft()
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.stale.discard(path)
+                continue
+            if stat.st_mtime >= self.modified_since:
+                self.stale.discard(path)
+                self.count(path, stat)
+            else:
+                self.stale_queue.append(path)
+
+        return self.total
+
+
+def get_folder_structure(bag_file, mode="both"):
+    """Get the folder structure for a bag file"""
+    source_folder = bag_file.parent
+    item_name = bag_file.stem
+
+    # A new folder for this item
+    item_folder = source_folder / item_name
+
+    # Subfolders only for the file types we're extracting
+    ply_folder = None
+    png_folder = None
+
+    if mode == "both" or mode == "ply":
+        ply_folder = item_folder / f"{item_name}_ply"
+
+    if mode == "both" or mode == "png":
+        png_folder = item_folder / f"{item_name}_png"
+
+    return source_folder, item_folder, ply_folder, png_folder
+
+
+def create_folder_structures(folder_structures):
+    """Create the item, ply and png folders of all bag files, returning the errors by folder"""
+    folders = []
+    for source_folder, item_folder, ply_folder, png_folder in folder_structures:
+        folders.append(item_folder)
+        if ply_folder:
+            folders.append(ply_folder)
+        if png_folder:
+            folders.append(png_folder)
+
+    return make_dirs(folders)
+
+
+def get_output_paths(ply_folder, png_folder):
+    """Get the rs-convert output prefixes for the folders of the selected file types"""
+    ply_output_path = ply_folder / "ply" if ply_folder else None
+    png_output_path = png_folder / "png" if png_folder else None
+    return ply_output_path, png_output_path
+
+
+def start_rs_convert(bag_file, rs_convert_path, ply_output_path, png_output_path,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL):
+    """Start rs-convert on a bag file, extracting only the file types that have an output path"""
+    command = [rs_convert_path, "-i", bag_file]
+
+    if ply_output_path:
+        command.extend(["-l", ply_output_path])
+
+    if png_output_path:
+        command.extend(["-p", png_output_path])
+
+    # rs-convert's output is discarded unless the caller wants it
+    return subprocess.Popen(
+        command,
+        stdout=stdout,
+        stderr=stderr,
+        **POPEN_OPTIONS
+    )
+
+
+def convert_one(bag_file, rs_convert_path, mode="both", stdout=None, stderr=None):
+    """
+    Convert a single .bag file from start to finish:
+    1. Create its item folder and the subfolders for the selected file types
+    2. Link (or copy) the original .bag file into the item folder
+    3. Extract the selected files using rs-convert.exe and wait for it
+
+    Args:
+        bag_file (Path): Path to the .bag file
+        rs_convert_path (str): Path to rs-convert.exe
+        mode (str): "both", "ply" or "png"
+        stdout, stderr: Where rs-convert's output goes, the console by default
+
+    Returns:
+        int: rs-convert's return code, 0 on success
+    """
+    folder_structure = get_folder_structure(bag_file, mode)
+    source_folder, item_folder, ply_folder, png_folder = folder_structure
+    for error in create_folder_structures([folder_structure]).values():
+        raise error
+
+    item_bag_file = item_folder / bag_file.name
+    if not link_bag_file(bag_file, item_bag_file):
+        fast_copy(bag_file, item_bag_file)
+
+    process = start_rs_convert(bag_file, rs_convert_path, *get_output_paths(ply_folder, png_folder),
+                               stdout=stdout, stderr=stderr)
+    return process.wait()
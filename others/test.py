@@ -1,26 +1,26 @@
-import os
-import shutil
-import subprocess
-import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 
-def process_bag_files(source_folder, rs_convert_path):
+from bag_core import convert_one
+
+# rs-convert jobs running at once, more than a few just compete for the disk
+MAX_PARALLEL_JOBS = 2
+
+def process_bag_files(source_folder, rs_convert_path, max_parallel_jobs=MAX_PARALLEL_JOBS):
     """
-    Process all .bag files in the source folder:
+    Process all .bag files in the source folder, several at a time:
     1. Create a dedicated folder for each .bag file
-    2. Copy the original .bag file to the new folder
+    2. Link (or copy) the original .bag file to the new folder
     3. Create subfolders for .ply and .png files
     4. Extract .ply and .png files using rs-convert.exe
     
     Args:
         source_folder (str): Path to the folder containing .bag files
         rs_convert_path (str): Path to rs-convert.exe
+        max_parallel_jobs (int): Most .bag files converted at the same time
     """
-    # Ensure the source folder path ends with a backslash
-    if not source_folder.endswith('\\'):
-        source_folder += '\\'
-    
     # Get all .bag files in the source folder
-    bag_files = glob.glob(source_folder + '*.bag')
+    bag_files = sorted(Path(source_folder).glob('*.bag'))
     
     if not bag_files:
         print(f"No .bag files found in {source_folder}")
@@ -28,49 +28,27 @@ def process_bag_files(source_folder, rs_convert_path):
     
     print(f"Found {len(bag_files)} .bag files to process")
     
-    # Process each .bag file
-    for bag_file in bag_files:
-        bag_filename = os.path.basename(bag_file)
-        item_name = os.path.splitext(bag_filename)[0]
-        
-        # Create a new folder for this item
-        item_folder = os.path.join(source_folder, item_name)
-        os.makedirs(item_folder, exist_ok=True)
-        
-        # Create subfolders for .ply and .png files
-        ply_folder = os.path.join(item_folder, f"{item_name}_ply")
-        png_folder = os.path.join(item_folder, f"{item_name}_png")
-        os.makedirs(ply_folder, exist_ok=True)
-        os.makedirs(png_folder, exist_ok=True)
-        
-        # Copy the original .bag file to the new folder
-        item_bag_file = os.path.join(item_folder, bag_filename)
-        print(f"Copying {bag_filename} to {item_folder}")
-        shutil.copy2(bag_file, item_bag_file)
-        
-        # Extract .ply and .png files using rs-convert.exe
-        print(f"Extracting .ply and .png files from {bag_filename}")
-        
-        # Create full paths for extraction
-        ply_output_path = os.path.join(ply_folder, "ply")
-        png_output_path = os.path.join(png_folder, "png")
-        
-        # Build the command to run rs-convert.exe
-        command = [
-            rs_convert_path,
-            "-i", bag_file,
-            "-l", ply_output_path,
-            "-p", png_output_path
-        ]
-        
-        try:
-            # Execute the command
-            subprocess.run(command, check=True)
-            print(f"Successfully processed {bag_filename}")
-        except subprocess.CalledProcessError as e:
-            print(f"Error processing {bag_filename}: {e}")
-        
-        print("-" * 50)
+    # Process the .bag files in parallel, one process per file at a time
+    with ProcessPoolExecutor(max_workers=min(max_parallel_jobs, len(bag_files))) as executor:
+        futures = {
+            executor.submit(convert_one, bag_file, rs_convert_path): bag_file
+            for bag_file in bag_files
+        }
+        
+        # Report each file as it finishes, so one failure doesn't stop the rest
+        for future in as_completed(futures):
+            bag_file = futures[future]
+            try:
+                returncode = future.result()
+            except Exception as e:
+                print(f"Error processing {bag_file.name}: {e}")
+            else:
+                if returncode == 0:
+                    print(f"Successfully processed {bag_file.name}")
+                else:
+                    print(f"Error processing {bag_file.name}: rs-convert.exe returned non-zero exit status {returncode}")
+            
+            print("-" * 50)
 
 if __name__ == "__main__":
     # Update these paths to match your environment